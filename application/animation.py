@@ -1,17 +1,13 @@
-from application import pg
-from typing import Callable, List, Tuple
+from application import pg, Surface
 
-from application.utils.enums import BezierFunctions
-from application.base import ResizableObject
+from collections import OrderedDict
+from typing import List, Tuple, Sequence, Set
 
+import numpy
 
-def check_active(func: Callable):
-    def wrapper(self: AnimatedObject, *args, **kwargs):
-        if self.active:
-            self.set_time(*args)
-            return func(self, *args, **kwargs)
-
-    return wrapper
+from application.utils.easing import ease, ease_batch
+from application.utils.enums import BezierFunctions
+from application.base import ResizableObject
 
 
 def color_generator():
@@ -23,20 +19,82 @@ def color_generator():
                     yield [x, y, z]
 
 
+class Scheduler:
+    def __init__(self):
+        self.__objects: Set['AnimatedObject'] = set()
+        self.speed = 1
+        self.paused = False
+
+    @property
+    def objects(self) -> Set['AnimatedObject']:
+        return self.__objects
+
+    @property
+    def idle(self):
+        return not self.__objects
+
+    def add(self, obj: 'AnimatedObject'):
+        self.__objects.add(obj)
+
+    def discard(self, obj: 'AnimatedObject'):
+        self.__objects.discard(obj)
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def tick(self, _time: float):
+        if self.paused or not self.__objects:
+            return
+        _time *= self.speed
+        objects = list(self.__objects)
+        for obj in objects:
+            obj.damage()
+            obj.set_time(_time * obj.direction)
+        for obj, value in zip(objects, AnimatedObject.batch_progress(objects)):
+            obj.set_animation(value)
+            obj.damage()
+            if obj.finished:
+                self.__objects.discard(obj)
+
+
 class AnimatedObject(ResizableObject):
+    scheduler = Scheduler()
+
     def __init__(self, *args, animation_time: float = 0.5, function=BezierFunctions.ease_out, **kwargs):
         super().__init__(*args, **kwargs)
         self.function = function
         self.animation_time = animation_time
         self.current_time = 0
+        self.direction = 1
 
     @property
     def active(self):
         return self.current_time > 0
 
+    @property
+    def animating(self):
+        return 0 < self.current_time < self.animation_time
+
+    @property
+    def finished(self):
+        if self.direction > 0:
+            return self.current_time >= self.animation_time
+        return self.current_time <= 0
+
     def activate(self):
+        self.direction = 1
         if self.current_time <= 0:
             self.current_time = 0.001
+        if not self.finished:
+            self.scheduler.add(self)
+
+    def deactivate(self):
+        self.direction = -1
+        if not self.finished:
+            self.scheduler.add(self)
 
     def set_time(self, _time: float):
         if self.current_time + _time <= self.animation_time:
@@ -44,20 +102,31 @@ class AnimatedObject(ResizableObject):
         else:
             self.current_time = self.animation_time
 
-    def get_next_value(self, start: float, stop: float):
-        p2 = self.function.value[0][1]
-        p3 = self.function.value[1][1]
-        t = self.current_time / self.animation_time
+    @property
+    def progress(self):
+        return self.current_time / self.animation_time
 
-        y = 3 * (1 - t) ** 2 * t * p2 + 3 * (1 - t) * t ** 2 * p3 + t ** 3
+    def get_next_value(self, start: float, stop: float, y: float = None):
+        if y is None:
+            y = ease(self.function, self.progress)
         return start + (stop - start) * y
 
+    @staticmethod
+    def batch_progress(objects: Sequence['AnimatedObject']) -> numpy.ndarray:
+        return ease_batch((obj.function for obj in objects), (obj.progress for obj in objects))
+
     def draw(self, *args):
         super().draw(*args)
 
 
+def quantize_color(color: Tuple, step: int = 4) -> Tuple:
+    return tuple(min(round(value / step) * step, 255) for value in color)
+
+
 class Frame(AnimatedObject):
     colors = iter(color_generator())
+    border_cache: OrderedDict = OrderedDict()
+    border_cache_size = 128
 
     def __init__(self, *args, width: int,
                  first_color: List[int],
@@ -101,32 +170,71 @@ class Frame(AnimatedObject):
     def buttons(self):
         return self.__buttons
 
-    @check_active
-    def set_animation(self, _time: float):
+    def surfaces(self) -> List[Surface]:
+        return super().surfaces() + [surface for button in self.__buttons for surface in button.surfaces()]
+
+    @property
+    def bounds(self) -> pg.Rect:
+        return super().bounds.inflate(self.border_width * 2, self.border_width * 2)
+
+    def set_animation(self, value: float):
+        if not hasattr(self, "default_colors"):
+            return
         for x in range(3):
             for y, color in enumerate([self.first_color, self.second_color]):
                 color[x] = self.get_next_value(
                     self.default_colors[0 ^ y][x],
-                    self.default_colors[1 ^ y][x]
+                    self.default_colors[1 ^ y][x],
+                    value
                 )
 
-    def fill(self, main_color: Tuple, add_color: Tuple, padding: int = 0):
+    @staticmethod
+    def gradient(main_color: Tuple, add_color: Tuple, size: Tuple[int, int]) -> Surface:
         color_rect = pg.Surface((2, 2), pg.SRCALPHA)
         pg.draw.line(color_rect, main_color, (0, 0), (1, 0))
         pg.draw.line(color_rect, add_color, (0, 1), (1, 1))
+        return pg.transform.smoothscale(color_rect, size)
+
+    @classmethod
+    def get_border(cls, main_color: Tuple, add_color: Tuple, size: Tuple[int, int], padding: int) -> Surface:
+        key = (size, padding, main_color, add_color)
+        if (border := cls.border_cache.get(key)) is not None:
+            cls.border_cache.move_to_end(key)
+            return border
+        border = cls.gradient(main_color, add_color, (size[0] + padding * 2, size[1] + padding * 2))
+        border.fill((0, 0, 0, 0), (padding, padding, *size))
+        cls.border_cache[key] = border
+        if len(cls.border_cache) > cls.border_cache_size:
+            cls.border_cache.popitem(last=False)
+        return border
+
+    def fill_edges(self, main_color: Tuple, add_color: Tuple, color_area: pg.Rect, padding: int):
+        strip = self.gradient(main_color, add_color, (padding, color_area.height))
+        self.surface.blit(strip, color_area.topleft)
+        self.surface.blit(strip, (color_area.right - padding, color_area.top))
+        for y in range(padding):
+            top, bottom = color_area.top + y, color_area.bottom - padding + y
+            pg.draw.line(self.surface, strip.get_at((0, y)),
+                         (color_area.left + padding, top), (color_area.right - padding - 1, top))
+            pg.draw.line(self.surface, strip.get_at((0, color_area.height - padding + y)),
+                         (color_area.left + padding, bottom), (color_area.right - padding - 1, bottom))
+
+    def fill(self, main_color: Tuple, add_color: Tuple, padding: int = 0):
+        main_color, add_color = quantize_color(main_color), quantize_color(add_color)
         color_area = pg.Rect(
             self.x - padding + self.margin_x,
             self.y - padding + self.margin_y,
             self.width + padding * 2,
             self.height + padding * 2
         )
-        color_rect = pg.transform.smoothscale(color_rect, (color_area.width, color_area.height))
-        color_rect.fill((0, 0, 0, 0), (padding, padding, self.width, self.height))
-        self.surface.blit(color_rect, color_area)
+        if self.pacer.degraded:
+            pg.draw.rect(self.surface, main_color, color_area, padding)
+        elif self.animating and hasattr(self, "default_colors"):
+            self.fill_edges(main_color, add_color, color_area, padding)
+        else:
+            self.surface.blit(self.get_border(main_color, add_color, (self.width, self.height), padding), color_area)
 
-    def draw(self, _time: float = 0, *args):
-        if hasattr(self, "default_colors"):
-            self.set_animation(_time)
+    def draw(self, *args):
         if self.border_width > 0:
             self.fill(self.first_color, self.second_color, self.border_width)
         super().draw(*args)
@@ -144,15 +252,15 @@ class Transition(AnimatedObject):
     def activate(self):
         self.current_time = 0.001
         self.x = -self.width
+        super().activate()
 
     @property
     def active(self):
         return self.animation_time > self.current_time > 0
 
-    @check_active
-    def set_animation(self, _time: float):
-        self.x = self.get_next_value(st := -self.width+self.margin_x, abs(st))
+    def set_animation(self, value: float):
+        self.x = self.get_next_value(st := -self.width+self.margin_x, abs(st), value)
 
-    def draw(self, _time: float, *args):
-        super().draw(*args)
-        self.set_animation(_time)
+    def draw(self, *args):
+        if self.active:
+            super().draw(*args)
@@ -2,19 +2,28 @@ from application import pg, Surface
 
 import abc
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Tuple
+from typing import Tuple, List
+
+from application.compositor import Compositor
+from application.pacing import FramePacer
 
 
 class Object(abc.ABC):
-    def __init__(self, surface: Surface, path: Path, save_origin: bool = False):
-        if not os.path.exists(path):
+    compositor = Compositor()
+    pacer = FramePacer()
+
+    def __init__(self, surface: Surface, path: Path, save_origin: bool = False, image: Surface = None):
+        if image is None and not os.path.exists(path):
             raise FileNotFoundError("Provided path is wrong")
         self.surface = surface
-        origin_image = pg.image.load(path)
+        origin_image = pg.image.load(path) if image is None else image
         if save_origin:
-            self.origin_image = origin_image
-        self.__image = pg.transform.smoothscale(origin_image.convert_alpha(), origin_image.get_size())
+            # Keep a single converted origin, resizes scale straight from it
+            self.origin_image = origin_image = origin_image.convert_alpha()
+        self.__image = origin_image.convert_alpha()
         self.__rect = self.__image.get_rect()
         self.__fixed = False
 
@@ -27,20 +36,31 @@ class Object(abc.ABC):
     def image(self):
         return self.__image
 
+    def surfaces(self) -> List[Surface]:
+        return [
+            surface for surface in (self.__image, getattr(self, "origin_image", None))
+            if surface is not None
+        ]
+
     def move_position(self, size: Tuple[int, int]):
         return self.x * (size[0] / self.width), self.y * (size[1] / self.height)
 
-    def resize_image(self, size: Tuple[int, int], update_rect: bool = True):
-        if hasattr(self, "origin_image"):
-            origin_image = self.origin_image
-        else:
-            origin_image = self.image
-        coords = self.move_position(size)
-        self.__image = pg.transform.smoothscale(origin_image.convert_alpha(), size)
+    def get_origin(self) -> Surface:
+        if not hasattr(self, "origin_image"):
+            return self.image.convert_alpha()
+        return self.origin_image
+
+    def set_image(self, image: Surface, update_rect: bool = True):
+        coords = self.move_position(image.get_size())
+        self.__image = image
         if update_rect:
             self.__rect = self.image.get_rect()
             self.x, self.y = coords
 
+    def resize_image(self, size: Tuple[int, int], update_rect: bool = True, smooth: bool = True):
+        scale = pg.transform.smoothscale if smooth else pg.transform.scale
+        self.set_image(scale(self.get_origin(), size), update_rect)
+
     def grayscale(self):
         self.__image = pg.transform.grayscale(self.__image)
         if hasattr(self, "origin_image"):
@@ -76,6 +96,13 @@ class Object(abc.ABC):
         margin_y = self.margin_y if hasattr(self, "margin_y") else 0
         return self.x + margin_x, self.y + margin_y, self.width, self.height
 
+    @property
+    def bounds(self) -> pg.Rect:
+        return pg.Rect(self.rect[0], self.rect[1], *self.image.get_size())
+
+    def damage(self):
+        self.compositor.damage(self.bounds)
+
     @property
     def width(self):
         return self.__rect.width
@@ -86,12 +113,18 @@ class Object(abc.ABC):
 
 
 class ResizableObject(Object):
+    resize_delay = 0.2
+    clock = staticmethod(time.monotonic)
+    synchronous = False
 
     def __init__(self, *args, resize: bool, **kwargs):
-        super().__init__(*args, kwargs.get("save_origin", False))
+        super().__init__(*args, kwargs.get("save_origin", False), kwargs.get("image"))
         self.surface_size = (None, None)
         self.margin_x, self.margin_y = 0, 0
         self.__resize = resize
+        self.__pending = None
+        self.__worker: threading.Thread = None
+        self.__rescaled = None
 
     def get_rotated_size(self, size: Tuple[int, int]):
         width, height = self.origin_image.get_size()
@@ -101,14 +134,42 @@ class ResizableObject(Object):
             return int(size[1] * (origin_ratio - ratio) + size[0]), size[1]
         return size[0], int(size[0] * (1 / origin_ratio - 1 / ratio) + size[1])
 
+    @property
+    def rescaling(self):
+        return self.__pending is not None or self.__rescaled is not None or (
+            self.__worker is not None and self.__worker.is_alive()
+        )
+
+    def rescale(self, size: Tuple[int, int]):
+        source = self.get_origin()
+
+        def worker():
+            self.__rescaled = pg.transform.smoothscale(source, size)
+
+        if self.synchronous:
+            return worker()
+        self.__worker = threading.Thread(target=worker, daemon=True)
+        self.__worker.start()
+
     def resize(self):
         new_size = self.surface.get_width(), self.surface.get_height()
         if self.surface_size != new_size:
             bg_width, bg_height = self.get_rotated_size(new_size)
-            self.resize_image((bg_width, bg_height))
+            progressive = self.surface_size != (None, None)
+            self.resize_image((bg_width, bg_height), smooth=not progressive)
             self.margin_x = -(bg_width - new_size[0]) // 2
             self.margin_y = -(bg_height - new_size[1]) // 2
             self.surface_size = new_size
+            self.__pending = self.clock() if progressive else None
+        elif self.__pending is not None and self.clock() - self.__pending >= self.resize_delay:
+            if self.__worker is None or not self.__worker.is_alive():
+                self.__pending = None
+                self.rescale(self.image.get_size())
+        if (image := self.__rescaled) is not None and (self.__worker is None or not self.__worker.is_alive()):
+            self.__rescaled = None
+            if self.__pending is None and image.get_size() == self.image.get_size():
+                self.set_image(image, False)
+                self.damage()
 
     @property
     def resizable(self):
@@ -0,0 +1,263 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy
+
+from application import pg
+from application.ui import Level, Square
+from application.utils import LinkObject
+from application.utils.builders import ParticleBuilder
+from application.animation import Frame
+from application.ux import App, Music
+
+
+class FakeStream:
+    def write(self, data: bytes):
+        ...
+
+    def stop_stream(self):
+        ...
+
+    def close(self):
+        ...
+
+
+class FakeMixer:
+    def open(self, **kwargs) -> FakeStream:
+        return FakeStream()
+
+    def get_format_from_width(self, width: int) -> int:
+        return width
+
+
+def summarize(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    return {
+        "unit": "ms",
+        "runs": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def measure(func: Callable, runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+class Benchmark:
+    dt = 1 / 60
+    # Images the App loads on start and when a level opens, the song is optional
+    assets = ("dead.jpg", "start_back.png", "heart.png", "icon.png", "play_button.png",
+              "square.png", "line.png", "rubber.png")
+
+    def __init__(self, root: Path, screen_size: Tuple[int, int] = (800, 600), quick: bool = False):
+        App.src_path, App.saves_path = root / "src", root / "saves"
+        Music.mixer = FakeMixer()
+        self.screen_size = screen_size
+        self.quick = quick
+        self.results: Dict[str, Dict] = {}
+        self.memory: Dict = None
+
+    @classmethod
+    def missing_assets(cls) -> List[Path]:
+        missing = [App.src_path / name for name in cls.assets if not (App.src_path / name).exists()]
+        if not App.saves_path.is_dir() or not os.listdir(App.saves_path):
+            missing.append(App.saves_path / "*.png")
+        return missing
+
+    def runs(self, count: int) -> int:
+        return max(1, count // 10) if self.quick else count
+
+    def record(self, name: str, samples: List[float]):
+        self.results[name] = summarize(samples)
+        print("{:<32} median {:>9.3f} ms   p95 {:>9.3f} ms".format(
+            name, self.results[name]["median"], self.results[name]["p95"]
+        ), file=sys.stderr)
+
+    def create_app(self, compositor: bool = False) -> App:
+        app = App(self.screen_size, compositor=compositor)
+        app.amplitude.value = None
+        app.wait_levels()
+        return app
+
+    @staticmethod
+    def frame(app: App, events: List = ()):
+        app.update(list(events), Benchmark.dt)
+        app.render()
+
+    def settle(self, app: App):
+        for _ in range(int(app.transition.animation_time / self.dt) + 2):
+            self.frame(app)
+
+    def bench_build(self, particles: int):
+        font = LinkObject(pg.font.SysFont("monospace", 24))
+        screen = pg.display.get_surface()
+        save = App.saves_path / sorted(os.listdir(App.saves_path))[0]
+
+        def build():
+            frame = Frame(screen, save, resize=False, width=300, first_color=[0, 0, 0], save_origin=True)
+            ParticleBuilder(Square).build(frame, particles, Level.N, App.src_path / "square.png", font=font)
+
+        self.record(f"build_{particles}", measure(build, self.runs(5 if particles < 100000 else 2)))
+
+    def bench_menu(self, compositor: bool):
+        app = self.create_app(compositor)
+        self.settle(app)
+        centres = [(frame.x + frame.width // 2, frame.y + frame.height // 2) for frame in app.games]
+        centres.append((self.screen_size[0] - 1, self.screen_size[1] - 1))
+        samples = []
+        for index in range(self.runs(300)):
+            events = []
+            if index % 30 == 0:
+                pos = centres[index // 30 % len(centres)]
+                events.append(pg.event.Event(pg.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0)))
+            samples.extend(measure(lambda: self.frame(app, events), 1))
+        self.record("menu_frame" + ("_compositor" if compositor else ""), samples)
+        return app
+
+    def open_level(self, app: App):
+        app.change_state(data=App.saves_path / sorted(os.listdir(App.saves_path))[0])
+        self.frame(app)
+        self.settle(app)
+
+    def bench_level(self, app: App, compositor: bool):
+        self.open_level(app)
+        suffix = "_compositor" if compositor else ""
+        self.record("level_frame" + suffix, measure(lambda: self.frame(app), self.runs(120)))
+
+        steps = iter([1.5, 0.6] * self.runs(20))
+        self.record("level_zoom" + suffix, measure(lambda: (app.level.zoom(next(steps)), self.frame(app)),
+                                                   self.runs(20) * 2))
+
+        squares = app.level.builder.particles
+        path = [
+            (square.x + square.margin_x + 1, square.y + square.margin_y + 1)
+            for square in squares[::max(1, len(squares) // 200)]
+        ]
+
+        def paint():
+            for index, pos in enumerate(path):
+                app.level.check_clicked(pos, (255, 0, 0, 255) if index % 2 else (0, 0, 255, 255))
+            self.frame(app)
+
+        self.record("level_paint_drag" + suffix, measure(paint, self.runs(10)))
+
+    def bench_music(self, chunk: int = 1024):
+        window = numpy.hamming(chunk)
+        data = numpy.sin(numpy.linspace(0, 440 * 2 * numpy.pi, chunk * 64)) * 0.3
+        fragments = [data[start:start + chunk] for start in range(0, len(data), chunk)]
+        samples = measure(lambda: [Music.analyse(fragment, window) for fragment in fragments], self.runs(50))
+        self.record("music_analyse_chunk", [sample / len(fragments) for sample in samples])
+
+    def bench_memory(self):
+        app = self.create_app()
+        self.settle(app)
+        app.memory.start()
+        app.memory.snapshot(app.state.name, app.memory_owners())
+        for _ in range(2):
+            self.open_level(app)
+            app.leave_level()
+            self.frame(app)
+            self.settle(app)
+        self.memory = app.memory.report(app.memory_owners())
+        app.memory.stop()
+        print(app.memory.format(self.memory), file=sys.stderr)
+
+    def run(self, only: List[str] = None) -> Dict:
+        suites = {
+            "build": lambda: [self.bench_build(count) for count in (1000, 5000, 20000, 100000)],
+            "frames": lambda: [self.bench_level(self.bench_menu(mode), mode) for mode in (False, True)],
+            "music": self.bench_music,
+            "memory": self.bench_memory,
+        }
+        pg.display.set_mode(self.screen_size)
+        pg.font.init()
+        for name, suite in suites.items():
+            if not only or name in only:
+                suite()
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "pygame": pg.version.ver,
+                "numpy": numpy.__version__,
+                "machine": platform.machine(),
+                "quick": self.quick,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": self.results,
+        }
+        if self.memory is not None:
+            report["memory"] = self.memory
+        return report
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, result in report["results"].items():
+        if (old := baseline.get("results", {}).get(name)) is None:
+            continue
+        limit = baseline.get("thresholds", {}).get(name, threshold)
+        result["baseline"] = old["median"]
+        result["change"] = result["median"] / old["median"] - 1 if old["median"] else 0
+        if result["change"] > limit:
+            regressions.append("{}: {:.3f} ms -> {:.3f} ms ({:+.1%}, limit {:+.1%})".format(
+                name, old["median"], result["median"], result["change"], limit
+            ))
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless benchmarks for build, render and input paths")
+    parser.add_argument("--root", type=Path, default=Path(__file__).parent, help="directory with src/ and saves/")
+    parser.add_argument("--output", type=Path, default=Path("benchmark.json"))
+    parser.add_argument("--baseline", type=Path, help="previous benchmark JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed median slowdown, 0.15 = 15%%")
+    parser.add_argument("--only", nargs="*", choices=["build", "frames", "music", "memory"])
+    parser.add_argument("--quick", action="store_true", help="run a tenth of the iterations")
+    args = parser.parse_args(argv)
+
+    benchmark = Benchmark(args.root, quick=args.quick)
+    if set(args.only or ("build", "frames", "memory")) & {"build", "frames", "memory"}:
+        if missing := benchmark.missing_assets():
+            print("missing assets: {}\npass --root with a complete src/ and saves/, or --only music".format(
+                ", ".join(str(path) for path in missing)
+            ), file=sys.stderr)
+            return 2
+
+    pg.init()
+    report = benchmark.run(args.only)
+
+    regressions = []
+    if args.baseline is not None:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        report["regressions"] = regressions
+    args.output.write_text(json.dumps(report, indent=2))
+
+    for line in regressions:
+        print("REGRESSION " + line, file=sys.stderr)
+    pg.quit()
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
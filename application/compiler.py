@@ -0,0 +1,168 @@
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+import time
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+
+from application import pg, Surface
+from application.utils.builders import Color, ParticleBuilder
+
+
+class LevelCompiler:
+    version = 2
+    extensions = {".png", ".jpg", ".jpeg", ".bmp"}
+
+    def __init__(self, output: Path, particles: int = 5000, depth: int = 20, width: int = 300, thumbnail: int = 200):
+        self.output = output
+        self.particles, self.depth, self.width, self.thumbnail = particles, depth, width, thumbnail
+
+    @property
+    def settings(self) -> str:
+        return f"{self.version}:{self.particles}:{self.depth}:{self.width}:{self.thumbnail}"
+
+    def digest(self, path: Path) -> str:
+        digest = hashlib.sha256(self.settings.encode())
+        with open(path, "rb") as file:
+            while chunk := file.read(1 << 20):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def targets(self, path: Path) -> Tuple[Path, Path]:
+        return self.output / f"{path.name}.json", self.output / f"{path.name}.thumb.png"
+
+    def is_fresh(self, path: Path, digest: str) -> bool:
+        data_path, thumbnail_path = self.targets(path)
+        if not (data_path.exists() and thumbnail_path.exists()):
+            return False
+        try:
+            return json.loads(data_path.read_text()).get("hash") == digest
+        except ValueError:
+            return False
+
+    def read(self, path: Path) -> Optional[Dict]:
+        data_path = self.targets(path)[0]
+        if not data_path.exists():
+            return None
+        try:
+            data = json.loads(data_path.read_text())
+        except ValueError:
+            return None
+        return data if data.get("hash") == self.digest(path) else None
+
+    @staticmethod
+    def load(path: Path) -> Surface:
+        # Same pixels as convert_alpha, but without a display in the worker
+        image = pg.image.load(path)
+        surface = pg.Surface(image.get_size(), pg.SRCALPHA, 32)
+        surface.blit(image, (0, 0))
+        return surface
+
+    @staticmethod
+    def components(blocks: numpy.ndarray) -> Tuple[numpy.ndarray, List[List[int]]]:
+        from scipy import ndimage
+
+        labels = numpy.zeros(blocks.shape, dtype=numpy.int32)
+        components = []
+        for index in numpy.unique(blocks):
+            regions, count = ndimage.label(blocks == index)
+            for number, area in enumerate(ndimage.find_objects(regions), 1):
+                mask = regions[area] == number
+                labels[area][mask] = len(components)
+                components.append([
+                    int(index), int(mask.sum()), area[1].start, area[0].start, area[1].stop - 1, area[0].stop - 1
+                ])
+        return labels, components
+
+    def compile(self, path: Path, digest: str) -> Dict:
+        image = self.load(path)
+        frame = pg.transform.smoothscale(image, (self.width, self.width / (image.get_width() / image.get_height())))
+
+        builder = ParticleBuilder(None)
+        size, row, column = builder.measure(*frame.get_size(), self.particles)
+        colors = [
+            builder.sample_color(frame, (x * size, y * size), size, self.depth)
+            for x, y in builder.layout(row, column, self.particles)
+        ]
+        palette = sorted(set(colors) | {Color((0, 0, 0, 0), self.depth)}, key=hash)
+        indexes = {color: index for index, color in enumerate(palette)}
+        cells = numpy.array([indexes[color] for color in colors], dtype=numpy.int32)
+        blocks = cells[:row * column].reshape(column, row)
+        labels, components = self.components(blocks)
+
+        data_path, thumbnail_path = self.targets(path)
+        thumbnail = pg.transform.smoothscale(
+            image, (self.thumbnail, round(self.thumbnail * image.get_height() / image.get_width()))
+        )
+        pg.image.save(thumbnail, thumbnail_path)
+        data_path.write_text(json.dumps({
+            "version": self.version,
+            "source": path.name,
+            "hash": digest,
+            "particles": self.particles,
+            "depth": self.depth,
+            "frame": list(frame.get_size()),
+            "size": size,
+            "row": row,
+            "column": column,
+            "palette": [list(color.value) for color in palette],
+            "levels": [list(color.levels) for color in palette],
+            "blocks": blocks.ravel().tolist(),
+            "extra": cells[row * column:].tolist(),
+            "labels": labels.ravel().tolist(),
+            "components": components,
+        }, separators=(",", ":")))
+        return {"source": path.name, "pixels": image.get_width() * image.get_height(), "cells": len(cells)}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile a directory of images into ready-to-play levels")
+    parser.add_argument("source", type=Path, nargs="?", default=Path(__file__).parent / "saves")
+    parser.add_argument("--output", type=Path, help="defaults to compiled/ next to the source directory")
+    parser.add_argument("--particles", type=int, default=5000)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--force", action="store_true", help="recompile unchanged inputs")
+    args = parser.parse_args(argv)
+
+    compiler = LevelCompiler(args.output or args.source.parent / "compiled", args.particles)
+    compiler.output.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    pending, skipped = [], 0
+    for path in sorted(args.source.iterdir()):
+        if path.suffix.lower() not in compiler.extensions:
+            continue
+        digest = compiler.digest(path)
+        if not args.force and compiler.is_fresh(path, digest):
+            skipped += 1
+        else:
+            pending.append((path, digest))
+
+    results, failed = [], 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(pending)))) as pool:
+        futures = {pool.submit(compiler.compile, path, digest): path for path, digest in pending}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results.append(result := future.result())
+                print("compiled {source}: {cells} cells".format(**result), file=sys.stderr)
+            except Exception as error:
+                failed += 1
+                print(f"failed {futures[future].name}: {error}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    pixels = sum(result["pixels"] for result in results)
+    print("{} compiled, {} unchanged, {} failed in {:.2f} s: {:.2f} levels/s, {:.1f} Mpx/s on {} processes".format(
+        len(results), skipped, failed, elapsed, len(results) / elapsed, pixels / elapsed / 1e6,
+        max(1, min(args.jobs, len(pending)))
+    ), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+from application import pg, Surface
+
+from typing import List, Optional, Sequence, Union
+
+
+RectLike = Union[pg.Rect, Sequence[int]]
+
+
+class Compositor:
+    def __init__(self):
+        self.enabled = False
+        self.__damaged: List[pg.Rect] = []
+        self.__full = True
+
+    @property
+    def dirty(self):
+        return self.__full or bool(self.__damaged)
+
+    def damage(self, rect: Optional[RectLike] = None):
+        if not self.enabled:
+            return
+        if rect is None:
+            self.__full, self.__damaged = True, []
+        elif not self.__full:
+            self.__damaged.append(pg.Rect(rect))
+
+    def collect(self, surface: Surface) -> List[pg.Rect]:
+        screen = surface.get_rect()
+        if self.__full:
+            rects = [screen]
+        elif self.__damaged:
+            rects = [screen.clip(self.__damaged[0].unionall(self.__damaged[1:]))]
+        else:
+            rects = []
+        self.__full, self.__damaged = False, []
+        return [rect for rect in rects if rect.width and rect.height]
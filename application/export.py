@@ -0,0 +1,91 @@
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import numpy
+
+
+class PNGWriter:
+    signature = b"\x89PNG\r\n\x1a\n"
+
+    def __init__(self, path: Path, size: Tuple[int, int], level: int = 6):
+        self.path, self.size = path, size
+        self.rows = 0
+        self.__compressor = zlib.compressobj(level)
+        self.__file = open(path, "wb")
+        self.__file.write(self.signature)
+        # 8 bit RGBA, no interlacing
+        self.chunk(b"IHDR", struct.pack(">IIBBBBB", *size, 8, 6, 0, 0, 0))
+
+    def __enter__(self) -> 'PNGWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def chunk(self, kind: bytes, data: bytes):
+        self.__file.write(struct.pack(">I", len(data)) + kind)
+        self.__file.write(data)
+        self.__file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+    def write(self, rows: numpy.ndarray):
+        lines = numpy.zeros((len(rows), self.size[0] * 4 + 1), dtype=numpy.uint8)
+        lines[:, 1:] = rows.reshape(len(rows), -1)
+        if data := self.__compressor.compress(lines.tobytes()):
+            self.chunk(b"IDAT", data)
+        self.rows += len(rows)
+
+    def close(self):
+        if self.__file.closed:
+            return
+        try:
+            if self.rows != self.size[1]:
+                raise ValueError(f"Wrote {self.rows} of {self.size[1]} rows")
+            self.chunk(b"IDAT", self.__compressor.flush())
+            self.chunk(b"IEND", b"")
+        finally:
+            self.__file.close()
+
+
+class ArtworkExporter:
+    batch_bytes = 1 << 22
+
+    def __init__(self, cells: numpy.ndarray, scale: int):
+        if scale < 1:
+            raise ValueError("Scale must be a positive integer")
+        self.cells, self.scale = cells, scale
+
+    @classmethod
+    def from_level(cls, level, scale: int) -> 'ArtworkExporter':
+        builder = level.builder
+        cells = numpy.zeros((builder.column, builder.row, 4), dtype=numpy.uint8)
+        for square in builder.particles:
+            x, y = square.margin_x // square.width, square.margin_y // square.height
+            if y < builder.column and x < builder.row:
+                cells[y, x] = tuple(square.image.get_at((0, 0)))
+        return cls(cells, scale)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.cells.shape[1] * self.scale, self.cells.shape[0] * self.scale
+
+    def rows(self) -> Iterator[numpy.ndarray]:
+        batch = max(1, min(self.scale, self.batch_bytes // (self.size[0] * 4)))
+        for cells in self.cells:
+            line = numpy.repeat(cells, self.scale, axis=0)
+            for start in range(0, self.scale, batch):
+                yield numpy.broadcast_to(line, (min(batch, self.scale - start), *line.shape))
+
+    def write(self, path: Path) -> Path:
+        with PNGWriter(path, self.size) as writer:
+            for rows in self.rows():
+                writer.write(rows)
+        return path
+
+    def start(self, path: Path) -> threading.Thread:
+        # Not a daemon, so closing the window does not truncate the file
+        thread = threading.Thread(target=self.write, args=(path,), name=f"export {Path(path).name}")
+        thread.start()
+        return thread
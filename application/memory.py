@@ -0,0 +1,145 @@
+from application import Surface
+
+import gc
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy
+
+
+Owners = Dict[str, Iterable[Any]]
+
+
+def surface_bytes(surface: Surface) -> int:
+    return surface.get_pitch() * surface.get_height()
+
+
+def array_buffer(array: numpy.ndarray) -> numpy.ndarray:
+    # Views report their own slice, the memory belongs to the base array
+    while isinstance(array.base, numpy.ndarray):
+        array = array.base
+    return array
+
+
+def walk(item: Any) -> Iterator[Any]:
+    if item is None:
+        return
+    if isinstance(item, (Surface, numpy.ndarray)):
+        yield item
+    elif hasattr(item, "surfaces"):
+        yield from item.surfaces()
+    elif isinstance(item, dict):
+        for value in item.values():
+            yield from walk(value)
+    elif isinstance(item, (list, tuple, set)):
+        for value in item:
+            yield from walk(value)
+
+
+class MemoryTracker:
+    def __init__(self, frames: int = 1, limit: int = 10):
+        self.frames, self.limit = frames, limit
+        self.snapshots: List[Tuple[str, tracemalloc.Snapshot, Dict]] = []
+
+    @property
+    def enabled(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not self.enabled:
+            tracemalloc.start(self.frames)
+
+    def stop(self):
+        tracemalloc.stop()
+        self.snapshots.clear()
+
+    @staticmethod
+    def account(owners: Owners) -> Dict[str, Dict[str, int]]:
+        seen = set()
+        result = {}
+        # Shared buffers are charged to the first owner that reaches them
+        for owner, items in owners.items():
+            usage = result[owner] = {"surfaces": 0, "surface_bytes": 0, "arrays": 0, "array_bytes": 0}
+            for item in walk(items):
+                if isinstance(item, numpy.ndarray):
+                    item = array_buffer(item)
+                if id(item) in seen:
+                    continue
+                seen.add(id(item))
+                if isinstance(item, numpy.ndarray):
+                    usage["arrays"] += 1
+                    usage["array_bytes"] += item.nbytes
+                else:
+                    usage["surfaces"] += 1
+                    usage["surface_bytes"] += surface_bytes(item)
+        return result
+
+    @staticmethod
+    def total(usage: Dict[str, Dict[str, int]]) -> int:
+        return sum(values["surface_bytes"] + values["array_bytes"] for values in usage.values())
+
+    def snapshot(self, label: str, owners: Owners):
+        if not self.enabled:
+            return
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        self.snapshots.append((label, snapshot, self.account(owners)))
+
+    def diff(self, before: int, after: int) -> Dict:
+        (old_label, old, old_usage), (new_label, new, new_usage) = self.snapshots[before], self.snapshots[after]
+        stats = new.compare_to(old, "lineno")
+        return {
+            "from": old_label,
+            "to": new_label,
+            "traced_change": sum(stat.size_diff for stat in stats),
+            "accounted_change": self.total(new_usage) - self.total(old_usage),
+            "owners_change": {
+                owner: self.total({owner: usage}) - self.total({owner: old_usage[owner]})
+                for owner, usage in new_usage.items() if owner in old_usage
+            },
+            "top": [
+                {"where": "{}:{}".format(stat.traceback[0].filename, stat.traceback[0].lineno),
+                 "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in stats[:self.limit]
+            ],
+        }
+
+    def report(self, owners: Owners) -> Dict:
+        usage = self.account(owners)
+        current, peak = tracemalloc.get_traced_memory() if self.enabled else (0, 0)
+        return {
+            "owners": usage,
+            "accounted_bytes": self.total(usage),
+            "traced": {"current": current, "peak": peak},
+            "snapshots": [
+                {"label": label, "traced": sum(stat.size for stat in snapshot.statistics("filename")),
+                 "accounted_bytes": self.total(snapshot_usage)}
+                for label, snapshot, snapshot_usage in self.snapshots
+            ],
+            "diffs": [self.diff(index - 1, index) for index in range(1, len(self.snapshots))],
+        }
+
+    def dump(self, owners: Owners, path: Path = None) -> Path:
+        path = path or Path(time.strftime("memory-%Y%m%d-%H%M%S.json"))
+        Path(path).write_text(json.dumps(self.report(owners), indent=2))
+        return path
+
+    @staticmethod
+    def format(report: Dict) -> str:
+        lines = ["{:<24}{:>10}{:>12}{:>8}{:>12}".format("owner", "surfaces", "MB", "arrays", "MB")]
+        for owner, usage in report["owners"].items():
+            lines.append("{:<24}{:>10}{:>12.2f}{:>8}{:>12.2f}".format(
+                owner, usage["surfaces"], usage["surface_bytes"] / 2 ** 20,
+                usage["arrays"], usage["array_bytes"] / 2 ** 20
+            ))
+        for diff in report["diffs"]:
+            lines.append("{} -> {}: traced {:+.2f} MB, accounted {:+.2f} MB".format(
+                diff["from"], diff["to"], diff["traced_change"] / 2 ** 20, diff["accounted_change"] / 2 ** 20
+            ))
+        return "\n".join(lines)
@@ -0,0 +1,52 @@
+from application import pg
+
+from typing import List, Optional, Tuple
+
+
+class FramePacer:
+    def __init__(self, fps: int = 60, idle_fps: int = 5, budget: Optional[float] = None,
+                 linger: float = 0.25, patience: int = 30):
+        self.fps, self.idle_fps = fps, idle_fps
+        self.budget, self.linger, self.patience = budget, linger, patience
+        self.degraded = False
+        self.idle = False
+        self.__active_at = 0
+        self.__slow, self.__fast = 0, 0
+
+    def wake(self):
+        self.__active_at = pg.time.get_ticks()
+
+    def can_idle(self, animated: bool) -> bool:
+        if animated:
+            self.wake()
+            return False
+        return pg.time.get_ticks() - self.__active_at >= self.linger * 1000
+
+    def record(self, frame_time: float) -> bool:
+        if self.budget is None:
+            return False
+        if frame_time > self.budget:
+            self.__slow, self.__fast = self.__slow + 1, 0
+        elif frame_time < self.budget / 2:
+            self.__slow, self.__fast = 0, self.__fast + 1
+        if not self.degraded and self.__slow >= self.patience:
+            self.degraded = True
+            return True
+        if self.degraded and self.__fast >= self.patience:
+            self.degraded = False
+            return True
+        return False
+
+    def tick(self, clock: pg.time.Clock, animated: bool) -> Tuple[float, List[pg.event.Event]]:
+        self.idle = self.can_idle(animated)
+        if self.idle:
+            event = pg.event.wait(int(1000 / self.idle_fps) if self.idle_fps else 0)
+            events = ([event] if event.type != pg.NOEVENT else []) + pg.event.get()
+            clock.tick()
+            dt = 1 / self.fps
+        else:
+            dt = clock.tick(self.fps) / 1000
+            events = pg.event.get()
+        if events:
+            self.wake()
+        return dt, events
@@ -0,0 +1,136 @@
+from application import pg, Surface
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy
+
+
+class FrameProfiler:
+    max_phases = 16
+
+    def __init__(self, size: int = 600):
+        self.enabled = False
+        self.overlay = False
+        self.size = size
+        self.__phases: Dict[str, int] = {}
+        self.__starts = numpy.zeros(size)
+        self.__totals = numpy.zeros(size)
+        self.__durations = numpy.zeros((size, self.max_phases))
+        self.__offsets = numpy.zeros((size, self.max_phases))
+        self.__count = 0
+        self.__open = False
+        self.__start = self.__last = 0.0
+        self.__font = None
+
+    @property
+    def phases(self) -> List[str]:
+        return list(self.__phases)
+
+    @property
+    def frames(self) -> int:
+        return min(self.__count, self.size)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        row = self.__count % self.size
+        self.__durations[row] = 0
+        self.__offsets[row] = -1
+        self.__start = self.__last = time.perf_counter()
+        self.__starts[row] = self.__start
+        self.__open = True
+
+    def mark(self, phase: str):
+        if not self.__open:
+            return
+        now = time.perf_counter()
+        if (index := self.__phases.get(phase)) is None:
+            if len(self.__phases) == self.max_phases:
+                raise ValueError("Too many profiler phases")
+            index = self.__phases[phase] = len(self.__phases)
+        row = self.__count % self.size
+        if self.__offsets[row, index] < 0:
+            self.__offsets[row, index] = self.__last - self.__start
+        self.__durations[row, index] += now - self.__last
+        self.__last = now
+
+    def end_frame(self):
+        if not self.__open:
+            return
+        self.__totals[self.__count % self.size] = time.perf_counter() - self.__start
+        self.__count += 1
+        self.__open = False
+
+    def rows(self) -> numpy.ndarray:
+        if self.__count <= self.size:
+            return numpy.arange(self.__count)
+        return (numpy.arange(self.size) + self.__count) % self.size
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        rows = self.rows()
+        if not len(rows):
+            return {}
+        columns = {phase: self.__durations[rows, index] for phase, index in self.__phases.items()}
+        columns["frame"] = self.__totals[rows]
+        result = {}
+        for phase, values in columns.items():
+            p50, p95, p99 = numpy.percentile(values, (50, 95, 99)) * 1000
+            result[phase] = {"p50": p50, "p95": p95, "p99": p99, "max": values.max() * 1000}
+        return result
+
+    def worst(self) -> Dict[str, float]:
+        rows = self.rows()
+        if not len(rows):
+            return {}
+        row = rows[numpy.argmax(self.__totals[rows])]
+        result = {phase: self.__durations[row, index] * 1000 for phase, index in self.__phases.items()}
+        result["frame"] = self.__totals[row] * 1000
+        return result
+
+    def trace(self) -> Dict:
+        rows = self.rows()
+        events = []
+        origin = self.__starts[rows[0]] if len(rows) else 0
+        for frame, row in enumerate(rows):
+            start = (self.__starts[row] - origin) * 1e6
+            events.append({
+                "name": "frame", "ph": "X", "pid": 0, "tid": 0,
+                "ts": start, "dur": self.__totals[row] * 1e6, "args": {"frame": frame}
+            })
+            for phase, index in self.__phases.items():
+                if self.__offsets[row, index] >= 0:
+                    events.append({
+                        "name": phase, "ph": "X", "pid": 0, "tid": 0,
+                        "ts": start + self.__offsets[row, index] * 1e6,
+                        "dur": self.__durations[row, index] * 1e6
+                    })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path: Path = None) -> Path:
+        path = path or Path(time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        Path(path).write_text(json.dumps(self.trace()))
+        return path
+
+    def draw_overlay(self, surface: Surface) -> pg.Rect:
+        if self.__font is None:
+            self.__font = pg.font.SysFont("monospace", 12)
+        stats = self.stats()
+        lines = ["{:<12}{:>7}{:>7}{:>7}{:>7}".format("ms", "p50", "p95", "p99", "max")] + [
+            "{:<12}{:>7.2f}{:>7.2f}{:>7.2f}{:>7.2f}".format(phase[:12], *values.values())
+            for phase, values in stats.items()
+        ]
+        labels = [self.__font.render(line, True, (230, 230, 230)) for line in lines]
+        width = max(label.get_width() for label in labels) + 8
+        height = sum(label.get_height() for label in labels) + 8
+        area = pg.Rect(surface.get_width() - width, 0, width, height)
+        background = pg.Surface(area.size, pg.SRCALPHA)
+        background.fill((0, 0, 0, 180))
+        surface.blit(background, area)
+        y = area.y + 4
+        for label in labels:
+            surface.blit(label, (area.x + 4, y))
+            y += label.get_height()
+        return area
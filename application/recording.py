@@ -0,0 +1,69 @@
+from application import pg
+
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+Frame = Tuple[float, List[pg.event.Event], Optional[float]]
+
+
+def encode_value(value: Any) -> Any:
+    if isinstance(value, (tuple, list)):
+        return [encode_value(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return None
+
+
+def decode_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(decode_value(item) for item in value)
+    return value
+
+
+def encode_event(event: pg.event.Event) -> List:
+    return [event.type, {key: encode_value(value) for key, value in event.dict.items()}]
+
+
+def decode_event(data: List) -> pg.event.Event:
+    return pg.event.Event(data[0], {key: decode_value(value) for key, value in data[1].items()})
+
+
+class SessionRecorder:
+    version = 1
+
+    def __init__(self, path: Path, screen_size: Tuple[int, int]):
+        self.path = path
+        self.__file = gzip.open(path, "wt", encoding="utf-8")
+        self.__amplitude = None
+        self.write({"version": self.version, "screen": list(screen_size)})
+
+    def write(self, data: Any):
+        self.__file.write(json.dumps(data, separators=(",", ":")) + "\n")
+
+    def record(self, dt: float, events: List[pg.event.Event], amplitude: float = None):
+        frame: List[Any] = [round(dt, 6)]
+        if amplitude != self.__amplitude:
+            frame.extend([[encode_event(event) for event in events], amplitude])
+            self.__amplitude = amplitude
+        elif events:
+            frame.append([encode_event(event) for event in events])
+        self.write(frame)
+
+    def close(self):
+        self.__file.close()
+
+
+def load_session(path: Path) -> Tuple[Dict, List[Frame]]:
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        header = json.loads(file.readline())
+        if header.get("version") != SessionRecorder.version:
+            raise ValueError(f"Unsupported session version {header.get('version')}")
+        frames = []
+        for line in file:
+            data = json.loads(line)
+            events = [decode_event(event) for event in data[1]] if len(data) > 1 else []
+            frames.append((data[0], events, data[2] if len(data) > 2 else None))
+    return header, frames
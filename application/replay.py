@@ -0,0 +1,104 @@
+import argparse
+import json
+import sys
+import time
+
+from pathlib import Path
+from typing import Dict, List
+
+from application.benchmark import FakeMixer, compare, summarize
+from application import pg
+from application.recording import load_session
+from application.base import ResizableObject
+from application.ux import App, Music
+
+
+class Replayer:
+    def __init__(self, path: Path, root: Path, dt: float = None, compositor: bool = False, profile: bool = False):
+        App.src_path, App.saves_path = root / "src", root / "saves"
+        Music.mixer = FakeMixer()
+        self.header, self.frames = load_session(path)
+        self.dt = dt
+        self.compositor, self.profile = compositor, profile
+        self.app: App = None
+        self.elapsed = 0.0
+
+    def run(self) -> List[float]:
+        # Resize debouncing follows replayed time and rescales inline, so frames don't depend on the wall clock
+        clock, synchronous = vars(ResizableObject)["clock"], ResizableObject.synchronous
+        ResizableObject.clock, ResizableObject.synchronous = staticmethod(lambda: self.elapsed), True
+        try:
+            return self.replay()
+        finally:
+            ResizableObject.clock, ResizableObject.synchronous = clock, synchronous
+
+    def replay(self) -> List[float]:
+        self.app = app = App(tuple(self.header["screen"]), compositor=self.compositor, profile=self.profile)
+        app.wait_levels()
+        samples = []
+        self.elapsed = 0.0
+        for dt, events, amplitude in self.frames:
+            self.elapsed += self.dt or dt
+            if amplitude is not None:
+                app.amplitude.value = amplitude
+            for ev in events:
+                if ev.type == pg.VIDEORESIZE:
+                    pg.display.set_mode(ev.size, pg.RESIZABLE)
+            app.profiler.begin_frame()
+            start = time.perf_counter()
+            app.update(events, self.dt or dt)
+            app.render()
+            samples.append((time.perf_counter() - start) * 1000)
+            app.profiler.end_frame()
+            if not app.running:
+                break
+        return samples
+
+    def report(self, samples: List[float]) -> Dict:
+        report = {
+            "meta": {"frames": len(samples), "compositor": self.compositor, "fixed_dt": self.dt},
+            "results": {"replay_frame" + ("_compositor" if self.compositor else ""): summarize(samples)},
+        }
+        if self.profile:
+            report["phases"] = self.app.profiler.stats()
+            report["worst"] = self.app.profiler.worst()
+        return report
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded session headlessly")
+    parser.add_argument("session", type=Path)
+    parser.add_argument("--root", type=Path, default=Path(__file__).parent, help="directory with src/ and saves/")
+    parser.add_argument("--dt", type=float, help="fixed frame delta instead of the recorded one")
+    parser.add_argument("--compositor", action="store_true")
+    parser.add_argument("--profile", action="store_true", help="collect per-phase stats")
+    parser.add_argument("--trace", type=Path, help="write a Chrome trace of the replay")
+    parser.add_argument("--output", type=Path, help="write results as benchmark JSON")
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    pg.init()
+    replayer = Replayer(args.session, args.root, args.dt, args.compositor, args.profile or args.trace is not None)
+    samples = replayer.run()
+    report = replayer.report(samples)
+    print("replayed {} frames, median {:.3f} ms, p95 {:.3f} ms".format(
+        len(samples), *[next(iter(report["results"].values()))[key] for key in ("median", "p95")]
+    ), file=sys.stderr)
+
+    regressions = []
+    if args.baseline is not None:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        report["regressions"] = regressions
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.trace is not None:
+        replayer.app.profiler.dump(args.trace)
+    pg.quit()
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupReport:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.phases: List[Tuple[str, float, float, str]] = []
+
+    def mark(self, name: str, start: float):
+        self.phases.append((
+            name, start - self.origin, time.perf_counter() - start, threading.current_thread().name
+        ))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name, start)
+
+    def format(self) -> str:
+        lines = ["{:<32}{:>10}{:>10}  {}".format("phase", "start ms", "cost ms", "thread")]
+        for name, start, duration, thread in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append("{:<32}{:>10.1f}{:>10.1f}  {}".format(name, start * 1000, duration * 1000, thread))
+        return "\n".join(lines)
+
+
+report = StartupReport()
+
+
+def main() -> int:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    # Running with -m makes this module __main__, the app reports into the importable one
+    report = importlib.import_module("application.startup").report
+    for module in ("application.animation", "application.ui", "application.ux"):
+        with report.phase(f"import {module}"):
+            importlib.import_module(module)
+
+    from application import pg
+    from application.ux import App, load_analysis, load_audio
+
+    pg.init()
+    with report.phase("App()"):
+        app = App((800, 600))
+    with report.phase("first frame"):
+        app.update(pg.event.get(), 1 / app.FPS)
+        app.render()
+    with report.phase("wait level thumbnails"):
+        app.wait_levels()
+    with report.phase("lazy scipy"):
+        load_analysis()
+    try:
+        with report.phase("lazy audio"):
+            load_audio()
+    except ImportError as error:
+        print(f"audio backend unavailable: {error}", file=sys.stderr)
+    print(report.format())
+    pg.quit()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Tuple, Any, Set
+from typing import Tuple, Any, Set, List, Dict
 
 from application import pg, Surface
 
@@ -12,18 +12,30 @@ from application.utils.builders import ParticleBuilder, Color
 class Heart(ResizableObject):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.amplitude = None
+
+    def update(self, _time: float, amplitude: float):
+        if self.resizable:
+            self.resize()
+        if (amplitude, self.surface_size) != self.amplitude:
+            self.damage()
+            self.bump(_time, amplitude)
+            self.amplitude = (amplitude, self.surface_size)
+            self.damage()
+
+    def rescale(self, size: Tuple[int, int]):
+        self.amplitude = None
 
     def bump(self, _time: float, amplitude: float):
         k = 1 + amplitude * 0.0008
         self.resize_image((
             width := self.width * k,
             height := self.height * k
-        ), False)
+        ), False, not (self.pacer.degraded or self.rescaling))
         self.x = -(width - self.width) // 2
         self.y = -(height - self.height) // 2
 
-    def draw(self, _time: float, amplitude: float):
-        self.bump(_time, amplitude)
+    def draw(self, *args):
         super().draw()
 
 
@@ -78,6 +90,13 @@ class Square(Button):
         super().draw(*args)
 
 
+def set_cursor(cursor: int):
+    try:
+        pg.mouse.set_cursor(cursor)
+    except pg.error:
+        pass
+
+
 def collide_condition(object: ResizableObject, coords: Tuple[int, int]):
     return all([
         object.x + object.margin_x <= coords[0] <= object.x + object.width + object.margin_x,
@@ -96,7 +115,7 @@ class Grid(list):
         self.max_height = 0
         self.pad_procent = pad_procent
 
-    def draw(self, _time: float):
+    def draw(self, *args):
         width = self.surface.get_width()
         y = padding = self.pad_procent * width
         for frames in list(zip(self[0::2], self[1::2])) + ([[self[-1]]] if len(self) % 2 == 1 else []):
@@ -105,7 +124,7 @@ class Grid(list):
                 max_height = frame.height if max_height < frame.height else max_height
                 x = padding if not is_last else width - padding - frame.width
                 frame.x, frame.y = (x, y + self.scroll_offset)
-                frame.draw(_time if self.hovered == frame else -_time)
+                frame.draw()
             y += padding + max_height
         self.max_height = y
 
@@ -113,39 +132,55 @@ class Grid(list):
         next_height = self.surface.get_height() + -self.scroll_offset + -offset
         if (next_height <= self.max_height and offset < 0) or (self.surface.get_height() <= next_height and offset > 0):
             self.scroll_offset += offset
+            Frame.compositor.damage()
+
+    def set_hovered(self, frame: Frame = None):
+        if self.hovered is not frame:
+            if self.hovered is not None:
+                self.hovered.deactivate()
+            if frame is not None:
+                frame.activate()
+            self.hovered = frame
 
     def check_collision(self, coords: Tuple[int, int]):
         for frame in self:
             if collide_condition(frame, coords):
-                pg.mouse.set_cursor(pg.SYSTEM_CURSOR_HAND)
-                self.hovered = frame
-                frame.activate()
+                set_cursor(pg.SYSTEM_CURSOR_HAND)
+                self.set_hovered(frame)
                 break
         else:
-            self.hovered = None
-            pg.mouse.set_cursor(pg.SYSTEM_CURSOR_ARROW)
+            self.set_hovered(None)
+            set_cursor(pg.SYSTEM_CURSOR_ARROW)
 
     def check_clicked(self, coords: Tuple[int, int], *args, **kwargs):
         for frame in filter(lambda f: f.buttons, self):
             for button in frame.buttons:
                 if collide_condition(button, coords):
                     button.click(*args, **kwargs)
-                    return True
+                    return button
 
 
 class Level(Grid):
 
     N = 20
 
-    def __init__(self, frame: Frame, particles: int, path: Path, builder: ParticleBuilder, **kwargs):
+    def __init__(self, frame: Frame, particles: int, path: Path, builder: ParticleBuilder,
+                 cached: bool = False, compiled: Dict = None, **kwargs):
         super().__init__(frame.surface)
         self.append(frame)
+        self.cached = cached
+        self.__layer: Surface = None
+        self.__position = (None, None)
 
         font = LinkObject(pg.font.SysFont("monospace", 24))
 
         self.builder = builder
 
-        self.__colors = self.builder.build(self.frame, particles, self.N, path, font=font, **kwargs)
+        # Compiled levels skip colour sampling, but only when made for this frame
+        if compiled is not None and tuple(compiled["frame"]) == (frame.width, frame.height):
+            self.__colors = self.builder.build_from(self.frame, compiled, path, font=font, **kwargs)
+        else:
+            self.__colors = self.builder.build(self.frame, particles, self.N, path, font=font, **kwargs)
         frame.set_button(*self.builder.particles)
 
         self.frame.resize_image((
@@ -160,10 +195,41 @@ class Level(Grid):
     def colors(self) -> Set[Color]:
         return self.__colors
 
+    def surfaces(self) -> List[Surface]:
+        return self.frame.surfaces() + ([self.__layer] if self.__layer is not None else [])
+
+    def draw_square(self, square: Square):
+        area = pg.Rect(square.margin_x, square.margin_y, square.width, square.height)
+        self.__layer.fill((0, 0, 0, 0), area)
+        self.__layer.blit(self.frame.image, area, area)
+        self.__layer.blit(square.image, area)
+        self.__layer.blit(square.label, square.text_rect.move(-square.x, -square.y))
+
+    @property
+    def layer(self) -> Surface:
+        if self.__layer is None:
+            self.__layer = pg.Surface((
+                max(self.frame.width, self.builder.row * self.builder.first.width),
+                max(self.frame.height, self.builder.column * self.builder.first.height)
+            ), pg.SRCALPHA)
+            self.__layer.blit(self.frame.image, (0, 0))
+            for square in self.builder.particles:
+                self.draw_square(square)
+        return self.__layer
+
+    def check_clicked(self, coords: Tuple[int, int], *args, **kwargs):
+        if (button := super().check_clicked(coords, *args, **kwargs)) is not None:
+            if self.__layer is not None:
+                self.draw_square(button)
+            button.damage()
+        return button
+
     def move_frame(self, start: Tuple[int, int], stop: Tuple[int, int]):
         if collide_condition(self.frame, start):
+            self.frame.damage()
             self.frame.x += stop[0] - start[0]
             self.frame.y += stop[1] - start[1]
+            self.frame.damage()
 
     def zoom(self, k: float):
         size = (self.frame.width, self.frame.height)
@@ -183,6 +249,17 @@ class Level(Grid):
         self.builder.rebuild((square_width, square_height))
         self.builder.first.font = pg.font.SysFont("monospace", int(self.builder.first.width / 1.6))
         self.frame.centre()
+        self.__layer = None
+        self.frame.compositor.damage()
 
     def draw(self, *args):
-        self.frame.draw()
+        if self.cached and self.frame.active:
+            if (position := (self.frame.x, self.frame.y)) != self.__position:
+                for button in self.frame.buttons:
+                    button.x, button.y = position
+                self.__position = position
+            if self.frame.border_width > 0:
+                self.frame.fill(self.frame.first_color, self.frame.second_color, self.frame.border_width)
+            self.surface.blit(self.layer, self.frame.rect[:2])
+        else:
+            self.frame.draw()
@@ -1,8 +1,8 @@
 import math
 from pathlib import Path
-from typing import Type, List, Tuple, Set
+from typing import Type, List, Tuple, Set, Iterator, Dict
 
-from application import pg
+from application import pg, Surface
 
 from application.animation import Frame
 from application.base import ResizableObject
@@ -13,6 +13,12 @@ class Color:
         self.__value = tuple(round(val / 255 * (depth - 1)) for val in value)
         self.depth = depth
 
+    @classmethod
+    def from_levels(cls, levels: Tuple[int, int, int, int], depth: int) -> 'Color':
+        color = cls((0, 0, 0, 0), depth)
+        color.__value = tuple(levels)
+        return color
+
     def __repr__(self):
         return "Color(({}, {}, {}, {}))".format(*self.__value)
 
@@ -24,6 +30,10 @@ class Color:
         pattern = "".join([f"{{{i}}}" for i in range(n)])
         return str(int("".join(pattern.format(*self.__value)), self.depth))
 
+    @property
+    def levels(self) -> Tuple:
+        return self.__value
+
     @property
     def value(self) -> Tuple:
         return tuple(
@@ -80,14 +90,31 @@ class ParticleBuilder:
             object.image.fill(data)
         return wrapper
 
+    @staticmethod
+    def sample_color(image: Surface, pos: Tuple[int, int], size: int, color_depth: int) -> Color:
+        color = pg.transform.average_color(image, (*pos, size, size))
+        return Color((color[0], color[1], color[2], 255), color_depth)
+
+    def measure(self, width: int, height: int, particles: int) -> Tuple[int, int, int]:
+        size = int(math.sqrt((width * height) / particles))
+        row = math.ceil(width / size) if self.remain_height else width // size
+        column = math.ceil(height / size) if self.remain_width else height // size
+        return size, row, column
+
+    @staticmethod
+    def layout(row: int, column: int, particles: int, pad: float = 1) -> Iterator[Tuple[float, float]]:
+        for y in range(column):
+            for x in range(row):
+                yield x * pad, y * pad
+        for x in range(particles - column * row):
+            yield pad, x * pad
+
     def create_particle(self, frame: Frame, coords: Tuple[int, int], color_depth: int, *args, **kwargs) -> Color:
         pos = (coords[0] * self.__size, coords[1] * self.__size)
-        color = pg.transform.average_color(
-            frame.image, (*pos, self.__size, self.__size)
-        )
-
-        color_data = Color((color[0], color[1], color[2], 255), color_depth)
+        color_data = self.sample_color(frame.image, pos, self.__size, color_depth)
+        return self.add_particle(frame, pos, color_data, *args, **kwargs)
 
+    def add_particle(self, frame: Frame, pos: Tuple[int, int], color_data: Color, *args, **kwargs) -> Color:
         square = self.__class(
             frame.surface, *args, resize=False, width=self.__size, data=color_data.value,
             text="", first_color=[0, 0, 0], border_width=0, save_origin=True, **kwargs
@@ -101,31 +128,40 @@ class ParticleBuilder:
     def build(self, frame: Frame, particles: int, color_depth: int, *args, pad: int = 1, **kwargs) -> Set:
         if self.__particles:
             raise Exception("Already initialized")
-        self.__size = int(math.sqrt((frame.width * frame.height) / particles))
-
-        self.__row = math.ceil(frame.width / self.__size) if self.remain_height else frame.width // self.__size
-        self.__column = math.ceil(frame.height / self.__size) if self.remain_width else frame.height // self.__size
+        self.__size, self.__row, self.__column = self.measure(frame.width, frame.height, particles)
 
         area = self.column * self.row
 
         colors = set()
-        for y in range(self.__column):
-            for x in range(self.__row):
-                colors.add(
-                    self.create_particle(frame, (x * pad, y * pad), color_depth, *args, **kwargs)
-                )
-        for x in range(particles - area):
+        for coords in self.layout(self.__row, self.__column, particles, pad):
             colors.add(
-                self.create_particle(
-                    frame, (pad, x * pad), color_depth, *args, **kwargs
-                )
+                self.create_particle(frame, coords, color_depth, *args, **kwargs)
             )
-            self.__row += int(not x)
+        self.__row += int(particles > area)
         colors.add(Color((0, 0, 0, 0), color_depth))
         if self.limit:
             self.__particles = self.__particles[:particles]
         return colors
 
+    def build_from(self, frame: Frame, data: Dict, *args, pad: int = 1, **kwargs) -> Set:
+        if self.__particles:
+            raise Exception("Already initialized")
+        self.__size, self.__row, self.__column = data["size"], data["row"], data["column"]
+        palette = [Color.from_levels(levels, data["depth"]) for levels in data["levels"]]
+
+        # Same insertion order as build, the palette numbering follows set order
+        colors = set()
+        cells = data["blocks"] + data["extra"]
+        for (x, y), index in zip(self.layout(self.__row, self.__column, data["particles"], pad), cells):
+            colors.add(
+                self.add_particle(frame, (x * self.__size, y * self.__size), palette[index], *args, **kwargs)
+            )
+        self.__row += int(data["particles"] > data["row"] * data["column"])
+        colors.add(Color((0, 0, 0, 0), data["depth"]))
+        if self.limit:
+            self.__particles = self.__particles[:data["particles"]]
+        return colors
+
     def rebuild(self, new_size: Tuple):
         for y in range(self.__column):
             for x in range(self.__row):
@@ -0,0 +1,91 @@
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy
+
+from application.utils.enums import BezierFunctions
+
+
+class CubicBezier:
+    resolution = 1024
+    samples = 8
+
+    def __init__(self, p1: Tuple[float, float], p2: Tuple[float, float]):
+        if not (0 <= p1[0] <= 1 and 0 <= p2[0] <= 1):
+            raise ValueError("Bezier x coordinates must be in [0, 1]")
+        self.p1, self.p2 = tuple(p1), tuple(p2)
+        self.__table = None
+
+    def __repr__(self):
+        return "CubicBezier({}, {})".format(self.p1, self.p2)
+
+    @staticmethod
+    def polynomial(t: numpy.ndarray, c1: float, c2: float) -> numpy.ndarray:
+        return 3 * (1 - t) ** 2 * t * c1 + 3 * (1 - t) * t ** 2 * c2 + t ** 3
+
+    @property
+    def table(self) -> numpy.ndarray:
+        if self.__table is None:
+            t = numpy.linspace(0, 1, self.resolution * self.samples + 1)
+            xs = self.polynomial(t, self.p1[0], self.p2[0])
+            ys = self.polynomial(t, self.p1[1], self.p2[1])
+            self.__table = numpy.interp(numpy.linspace(0, 1, self.resolution + 1), xs, ys)
+        return self.__table
+
+    def __call__(self, progress: float) -> float:
+        table = self.table
+        if progress <= 0:
+            return float(table[0])
+        if progress >= 1:
+            return float(table[-1])
+        index, fraction = divmod(progress * self.resolution, 1)
+        index = int(index)
+        return float(table[index] + (table[index + 1] - table[index]) * fraction)
+
+    def evaluate(self, progress: numpy.ndarray) -> numpy.ndarray:
+        position = numpy.clip(numpy.asarray(progress, dtype=float), 0, 1) * self.resolution
+        index = numpy.minimum(position.astype(int), self.resolution - 1)
+        table = self.table
+        return table[index] + (table[index + 1] - table[index]) * (position - index)
+
+
+curves: Dict[Any, CubicBezier] = {
+    function: CubicBezier(*function.value) for function in BezierFunctions
+}
+
+
+def register_curve(name: str, p1: Tuple[float, float], p2: Tuple[float, float]) -> CubicBezier:
+    if name in BezierFunctions.__members__:
+        raise ValueError(f"Curve {name} is already built in")
+    curves[name] = curve = CubicBezier(p1, p2)
+    return curve
+
+
+def get_curve(function: Any) -> CubicBezier:
+    if isinstance(function, CubicBezier):
+        return function
+    if isinstance(function, (tuple, list)):
+        function = tuple(map(tuple, function))
+    if (curve := curves.get(function)) is not None:
+        return curve
+    if isinstance(function, str) and function in BezierFunctions.__members__:
+        return curves[BezierFunctions[function]]
+    if isinstance(function, tuple):
+        curves[function] = curve = CubicBezier(*function)
+        return curve
+    raise KeyError(f"Unknown easing function {function}")
+
+
+def ease(function: Any, progress: float) -> float:
+    return get_curve(function)(progress)
+
+
+def ease_batch(functions: Iterable[Any], progress: Iterable[float]) -> numpy.ndarray:
+    functions = list(functions)
+    progress = numpy.fromiter(progress, dtype=float, count=len(functions))
+    result = numpy.empty_like(progress)
+    groups: Dict[int, list] = {}
+    for index, function in enumerate(functions):
+        groups.setdefault(id(curve := get_curve(function)), [curve, []])[1].append(index)
+    for curve, indexes in groups.values():
+        result[indexes] = curve.evaluate(progress[indexes])
+    return result
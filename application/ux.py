@@ -1,32 +1,64 @@
 import random
 
-from application import pg
+from application import pg, Surface
 
 import os
+import queue
+import sys
 import threading
+import time
 import wave
 
 import numpy
-import pyaudio
-import scipy.fftpack as spfft
-import soundfile
 
 from pathlib import Path
 from typing import Tuple, List, Any, Iterable, Dict
 
-from application.animation import Transition, Frame
+from application.animation import Transition, Frame, AnimatedObject
 from application.base import ResizableObject
-from application.ui import Heart, Grid, Button, Level, Square
+from application.compiler import LevelCompiler
+from application.export import ArtworkExporter
+from application.memory import MemoryTracker
+from application.profiler import FrameProfiler
+from application.recording import SessionRecorder
+from application.startup import report
+from application.ui import Heart, Grid, Button, Level, Square, set_cursor
 from application.utils import LinkObject
 from application.utils.builders import ParticleBuilder
 from application.utils.enums import BezierFunctions, States
 
 
+pyaudio = soundfile = spfft = None
+
+
+def load_analysis():
+    global spfft
+    if spfft is None:
+        start = time.perf_counter()
+        import scipy.fftpack as spfft
+        report.mark("import scipy.fftpack", start)
+
+
+def load_audio():
+    global pyaudio, soundfile
+    if pyaudio is None:
+        start = time.perf_counter()
+        import pyaudio
+        import soundfile
+        report.mark("import pyaudio, soundfile", start)
+
+
 class Music:
 
-    mixer = pyaudio.PyAudio()
+    mixer = None
 
     def __init__(self, filename: Path, chunk: int, amplitude: LinkObject):
+        load_audio()
+        load_analysis()
+        if Music.mixer is None:
+            start = time.perf_counter()
+            Music.mixer = pyaudio.PyAudio()
+            report.mark("PyAudio()", start)
         self.chunk = chunk
         self.song = wave.open(str(filename), 'rb')
         self.stream = self.mixer.open(
@@ -40,14 +72,16 @@ class Music:
         self.hamming = numpy.hamming(self.chunk)
         self.amplitude = amplitude
 
+    @staticmethod
+    def analyse(fragment: numpy.ndarray, window: numpy.ndarray) -> float:
+        load_analysis()
+        return float(numpy.abs(spfft.fft(window * fragment)).sum()) * 0.25
+
     def play(self):
         start = 0
         while len(data := self.song.readframes(self.chunk)) > 0:
             if len(fragment := self.data[start:start + self.chunk]) == self.chunk:
-                values = self.hamming * fragment
-                self.amplitude.value = sum(
-                    [numpy.sqrt(row.real ** 2 + row.imag ** 2) for row in spfft.fft(values)]
-                ) * 0.25
+                self.amplitude.value = self.analyse(fragment, self.hamming)
             self.stream.write(data)
             start += self.chunk
         self.stream.stop_stream()
@@ -61,49 +95,85 @@ class App:
     src_path = root_path / "src"
     saves_path = root_path / "saves"
 
+    export_scale = 32
+
     def __new__(cls, *args, **kwargs):
         if cls.instance is None:
             return super().__new__(cls)
         return cls.instance
 
-    def __init__levels__(self):
-        font = LinkObject(pg.font.SysFont("monospace", 24))
+    def __load__levels__(self):
+        start = time.perf_counter()
+        compiled_path = self.saves_path.parent / "compiled"
         for filename in os.listdir(self.saves_path):
-            # Set levels
-            self.games.append(
-                frame := Frame(
-                    self.screen,
-                    self.saves_path / filename,
-                    resize=False,
-                    width=200,
-                    first_color=(color := [34, 34, 34]),
-                    second_color=next(Frame.colors),
-                )
-            )
-            # Set play buttons
-            frame.set_button(
-                button := Button(
-                    self.screen, self.src_path / "play_button.png", text="Играть",
-                    resize=False, first_color=color, width=150, data=self.saves_path / filename,
-                    font=font, function=self.change_state, border_width=0
-                )
+            # Prefer thumbnails prepared by application.compiler
+            thumbnail = compiled_path / f"{filename}.thumb.png"
+            if thumbnail.exists() and thumbnail.stat().st_mtime >= (self.saves_path / filename).stat().st_mtime:
+                self.__thumbnails.put((filename, pg.image.load(thumbnail)))
+                continue
+            image = pg.image.load(self.saves_path / filename)
+            scale = pg.transform.smoothscale if image.get_bitsize() >= 24 else pg.transform.scale
+            self.__thumbnails.put((filename, scale(image, (200, round(200 * image.get_height() / image.get_width())))))
+        report.mark("level thumbnails", start)
+
+    def __init__levels__(self):
+        self.__level_font = LinkObject(pg.font.SysFont("monospace", 24))
+        self.__thumbnails = queue.Queue()
+        self.__levels_loader = threading.Thread(target=self.__load__levels__, daemon=True)
+        self.__levels_loader.start()
+
+    @property
+    def levels_loading(self):
+        return self.__levels_loader.is_alive() or not self.__thumbnails.empty()
+
+    def check_levels(self):
+        while not self.__thumbnails.empty():
+            self.__add__level__(*self.__thumbnails.get_nowait())
+            self.compositor.damage()
+
+    def wait_levels(self):
+        self.__levels_loader.join()
+        self.check_levels()
+
+    def __add__level__(self, filename: str, image: Surface):
+        # Set levels
+        self.games.append(
+            frame := Frame(
+                self.screen,
+                self.saves_path / filename,
+                image=image,
+                resize=False,
+                width=200,
+                first_color=(color := [34, 34, 34]),
+                second_color=next(Frame.colors),
             )
-            button.margin_x, button.margin_y = (
-                (frame.width - button.width) // 2,
-                (frame.height - button.height) // 2
+        )
+        # Set play buttons
+        frame.set_button(
+            button := Button(
+                self.screen, self.src_path / "play_button.png", text="Играть",
+                resize=False, first_color=color, width=150, data=self.saves_path / filename,
+                font=self.__level_font, function=self.change_state, border_width=0
             )
+        )
+        button.margin_x, button.margin_y = (
+            (frame.width - button.width) // 2,
+            (frame.height - button.height) // 2
+        )
 
     def __run__level__(self):
+        compiler = LevelCompiler(self.saves_path.parent / "compiled", particles=5000, depth=Level.N, width=300)
         self.level = Level(
             level_frame := Frame(
                 self.screen, self.__level_path.value,
                 resize=False,
-                width=300,
+                width=compiler.width,
                 first_color=[0, 0, 0],
                 save_origin=True
             ),
-            builder=ParticleBuilder(Square), particles=5000,
-            path=self.src_path / "square.png"
+            builder=ParticleBuilder(Square), particles=compiler.particles,
+            path=self.src_path / "square.png", cached=True,
+            compiled=compiler.read(Path(self.__level_path.value))
         )
         level_frame.activate()
         level_frame.centre()
@@ -150,16 +220,45 @@ class App:
         for button in self.level.builder.particles:
             button.text = color_matcher[button.data]
 
-    def __init__(self, screen_size: Tuple[int, int]):
+    def __init__(self, screen_size: Tuple[int, int], compositor: bool = False,
+                 idle_fps: int = 5, frame_budget: float = None, profile: bool = False, record: Path = None,
+                 memory: bool = False):
+        start = time.perf_counter()
+
         # Set screen parameters
         self.screen = pg.display.set_mode(screen_size, pg.RESIZABLE, pg.SRCALPHA)
 
+        # Set dirty rectangle rendering
+        self.compositor = ResizableObject.compositor
+        self.compositor.enabled = compositor
+
         # Set FPS
         self.FPS = 60
+        self.scheduler = AnimatedObject.scheduler
+
+        # Set frame pacing
+        self.pacer = ResizableObject.pacer
+        self.pacer.fps, self.pacer.idle_fps, self.pacer.budget = self.FPS, idle_fps, frame_budget
+
+        # Set frame profiler
+        self.profiler = FrameProfiler()
+        self.profiler.enabled = profile
+        self.__overlay: pg.Rect = None
+
+        # Set input recording
+        self.recorder = SessionRecorder(record, screen_size) if record is not None else None
+
+        # Set memory tracking
+        self.memory = MemoryTracker()
+        if memory:
+            self.memory.start()
+
         self.mouse_pos: float = None
+        self.__pressed = [False, False, False]
         self.__run: bool = True
 
         # Set transition image
+        images_start = time.perf_counter()
         self.transition = Transition(
             self.screen,
             self.src_path / "dead.jpg",
@@ -180,6 +279,8 @@ class App:
             resize=True, save_origin=True
         )
 
+        report.mark("window-sized images", images_start)
+
         # Set gameplay objects
         self.__current_state: int = None
         self.__state = LinkObject(None)
@@ -196,6 +297,8 @@ class App:
 
         # Set music configuration
         self.amplitude = LinkObject(None)
+        self.music: Music = None
+        self.music_failed = False
 
         # Set icon image
         icon = pg.image.load(self.src_path / "icon.png")
@@ -208,11 +311,18 @@ class App:
         self.__state.value = States(0)
 
         pg.init()
+        report.mark("App.__init__", start)
 
     def change_state(self, **kwargs):
         self.__state.value = States(1)
         self.__level_path.value = kwargs.get("data")
-        pg.mouse.set_cursor(pg.SYSTEM_CURSOR_ARROW)
+        set_cursor(pg.SYSTEM_CURSOR_ARROW)
+
+    def leave_level(self):
+        self.__state.value = States(0)
+        self.__level_path.value = None
+        self.level, self.palitre = None, None
+        self.__selected_color = (0, 0, 0, 0)
 
     def select_color(self, buttons: List[Button]):
         width, height = buttons[0].width, buttons[0].height
@@ -230,100 +340,240 @@ class App:
             self.__selected_color = data
             selected.resize_image((width + 5, height + 5))
             selected.font = pg.font.SysFont("monospace", int((width + 5) / 1.6))
+            self.compositor.damage()
         return wrapper
 
     @property
     def state(self):
         return self.__state.value
 
+    @property
+    def running(self):
+        return self.__run
+
     def check_state(self):
         if (val := self.__state.value) != self.__current_state:
             self.__current_state = val
             self.transition.activate()
+            self.compositor.damage()
+            if self.memory.enabled:
+                self.memory.snapshot(val.name, self.memory_owners())
+
+    def memory_owners(self) -> Dict[str, Any]:
+        return {
+            "menu grid": self.games,
+            "level cells": self.level,
+            "palette": self.palitre,
+            "audio": [self.music.data, self.music.hamming] if self.music is not None else None,
+            "transition/background": [self.background, self.transition, self.heart],
+            "borders": Frame.border_cache,
+        }
+
+    def play_music(self):
+        start = time.perf_counter()
+        try:
+            music = Music(self.src_path / "song.wav", 1024, self.amplitude)
+        except Exception:
+            self.music_failed = True
+            raise
+        report.mark("audio", start)
+        self.music = music
+        music.play()
 
     def start_music(self):
-        music = Music(self.src_path / "song.wav", 1024, self.amplitude)
         thread = threading.Thread(
-            target=music.play,
+            target=self.play_music,
             args=(), daemon=True
         )
         thread.start()
         return thread
 
+    @property
+    def pressed(self) -> List[bool]:
+        return self.__pressed
+
+    def check_pressed(self, ev):
+        if ev.type == pg.MOUSEMOTION:
+            self.__pressed = [bool(button) for button in ev.buttons[:3]]
+        elif ev.type in (pg.MOUSEBUTTONDOWN, pg.MOUSEBUTTONUP) and 1 <= ev.button <= 3:
+            self.__pressed[ev.button - 1] = ev.type == pg.MOUSEBUTTONDOWN
+
     def check_menu_events(self, events) -> bool:
         for ev in events:
+            self.check_pressed(ev)
             if ev.type == pg.QUIT:
                 self.__run = False
             if ev.type == pg.MOUSEWHEEL:
                 self.games.scroll(ev.y * 25)
             if ev.type == pg.MOUSEMOTION:
                 self.games.check_collision(ev.pos)
-            if pg.mouse.get_pressed()[0]:
+            if self.pressed[0] and hasattr(ev, "pos"):
                 self.games.check_clicked(
                     ev.pos
                 )
 
     def check_level_events(self, events) -> bool:
         for ev in events:
+            self.check_pressed(ev)
             if ev.type == pg.QUIT:
                 self.__run = False
-            if ev.type == pg.MOUSEMOTION and pg.mouse.get_pressed()[2]:
+            if ev.type == pg.MOUSEMOTION and self.pressed[2]:
                 if self.mouse_pos is not None:
                     self.level.move_frame(self.mouse_pos, ev.pos)
             if ev.type == pg.MOUSEWHEEL:
                 self.level.zoom(1.5 if ev.y > 0 else 0.6)
+            if ev.type == pg.KEYDOWN and ev.key == pg.K_s and ev.mod & pg.KMOD_CTRL:
+                self.export_artwork()
+            if ev.type == pg.KEYDOWN and ev.key == pg.K_ESCAPE:
+                self.leave_level()
+                return
             if hasattr(ev, "pos"):
                 self.mouse_pos = ev.pos
-            if pg.mouse.get_pressed()[0]:
+            if self.pressed[0] and hasattr(ev, "pos"):
                 if self.palitre.check_clicked(ev.pos):
                     continue
                 self.level.check_clicked(ev.pos, self.__selected_color)
 
-    def draw_intractable(self, events, delta: float):
+    def export_artwork(self, scale: int = None) -> threading.Thread:
+        exports_path = self.saves_path.parent / "exports"
+        exports_path.mkdir(exist_ok=True)
+        path = exports_path / time.strftime(f"{Path(self.__level_path.value).stem}-%Y%m%d-%H%M%S.png")
+        # Cells are copied here, upscaling and encoding happen off the main thread
+        return ArtworkExporter.from_level(self.level, scale or self.export_scale).start(path)
+
+    def check_profiler_keys(self, key: int):
+        if key == pg.K_F3:
+            self.profiler.overlay = not self.profiler.overlay
+            self.profiler.enabled = self.profiler.enabled or self.profiler.overlay
+            self.compositor.damage()
+        if key == pg.K_F4 and self.profiler.enabled:
+            self.profiler.dump()
+        if key == pg.K_F5:
+            if not self.memory.enabled:
+                self.memory.start()
+                self.memory.snapshot(self.state.name, self.memory_owners())
+            print(self.memory.format(self.memory.report(self.memory_owners())), file=sys.stderr)
+            self.memory.dump(self.memory_owners())
+
+    def check_intractable(self, events, delta: float):
+        for ev in events:
+            if ev.type in (pg.VIDEORESIZE, pg.WINDOWEXPOSED):
+                self.compositor.damage()
+            if ev.type == pg.KEYDOWN:
+                self.check_profiler_keys(ev.key)
+
+        # Rescale window-sized images
+        for obj in (self.background, self.transition, self.heart):
+            obj.resize()
         match self.state:
             case States.menu:
+                self.check_levels()
                 self.check_menu_events(events)
 
-                self.games.draw(delta)
-                # Draw heart
-                self.heart.draw(delta, self.amplitude.value if self.amplitude.value else 200)
+                # Update heart
+                self.heart.update(delta, self.amplitude.value if self.amplitude.value else 200)
             case States.level:
                 if self.level is not None:
                     self.check_level_events(events)
 
-                if self.level is None:
-                    self.__post__init__()
+        if self.state == States.level and self.level is None:
+            self.__post__init__()
 
+    def draw_intractable(self, *args):
+        match self.state:
+            case States.menu:
+                self.games.draw()
+                # Draw heart
+                self.heart.draw()
+            case States.level:
                 self.level.draw()
-                self.palitre.draw(delta)
+                self.palitre.draw()
+
+    def draw(self):
+        # Draw background
+        self.background.draw()
+        self.profiler.mark("background")
+
+        # Draw intractable
+        self.draw_intractable()
+        self.profiler.mark("intractable")
+
+        # Draw transition
+        self.transition.draw()
+        self.profiler.mark("transition")
+
+        # Draw profiler overlay
+        if self.profiler.overlay:
+            self.__overlay = self.profiler.draw_overlay(self.screen)
+            self.profiler.mark("overlay")
+
+    @property
+    def animated(self):
+        return any([
+            not self.scheduler.idle,
+            self.state == States.menu and self.amplitude.value is not None,
+            self.background.rescaling, self.transition.rescaling, self.heart.rescaling,
+            self.state == States.menu and self.levels_loading
+        ])
+
+    def update(self, events, dt: float):
+        # Check intractable
+        self.check_intractable(events, dt)
+        self.profiler.mark("events")
+        self.check_state()
+
+        # Update animations
+        self.scheduler.tick(dt)
+        self.profiler.mark("animations")
+
+    def render(self):
+        if self.profiler.overlay:
+            self.compositor.damage(self.__overlay)
+        if self.compositor.enabled:
+            if rects := self.compositor.collect(self.screen):
+                self.screen.set_clip(rects[0])
+                self.draw()
+                self.screen.set_clip(None)
+                pg.display.update(rects)
+        else:
+            self.draw()
+            pg.display.update()
+        self.profiler.mark("display")
 
     def loop(self):
         music_thread = self.start_music()
         clock = pg.time.Clock()
         while self.__run:
             # Tick the clock
-            dt = clock.tick(self.FPS) / 1000
+            self.pacer.fps = self.FPS
+            dt, events = self.pacer.tick(clock, self.animated)
+            if not self.pacer.idle and self.pacer.record(clock.get_rawtime() / 1000):
+                self.compositor.damage()
+            self.profiler.begin_frame()
+            if self.recorder is not None:
+                self.recorder.record(dt, events, self.amplitude.value)
 
-            # Draw background
-            self.background.draw()
+            # Update state
+            self.update(events, dt)
 
-            # Draw intractable
-            self.draw_intractable(pg.event.get(), dt)
-
-            # Draw transition
-            self.check_state()
-            self.transition.draw(dt)
+            # Draw and update
+            self.render()
+            self.profiler.end_frame()
 
             # Check music
-            if not music_thread.is_alive():
+            if not music_thread.is_alive() and not self.music_failed:
                 music_thread = self.start_music()
 
-            # Update
-            pg.display.update()
-
+        if self.recorder is not None:
+            self.recorder.close()
         pg.quit()
 
 
 if __name__ == '__main__':
-    app = App(screen_size=(800, 600))
+    app = App(
+        screen_size=(800, 600),
+        compositor=os.environ.get("COMPOSITOR", "1") != "0",
+        record=Path(record) if (record := os.environ.get("RECORD_SESSION")) else None,
+        memory=bool(os.environ.get("TRACE_MEMORY"))
+    )
     app.loop()